@@ -2,12 +2,12 @@ from rich import print
 import traceback
 from src.config import Settings
 from src.docker_ops import docker_compose_up
-from src.db import get_engine, wait_for_db, scalar_int
+from src.db import get_engine, wait_for_db, scalar_ints
 from src.load_csv import load_csv_to_raw
 from src.table_creation import create_table, load_user_attributes
 from src.generator import generate
 from src.preprocessing import create_schema
-from src.reporting import fetch_bi_report, export_bireport_to_csv
+from src.reporting import fetch_bi_report, export_bireport
 
 def main() -> None:
     s = Settings()
@@ -28,10 +28,16 @@ def main() -> None:
         print(f"[green]Loaded rows:[/green] {counts}")
 
     print("[bold cyan]4) Verify counts[/bold cyan]")
-    print("raw_users:", scalar_int(engine, "SELECT COUNT(*) FROM raw.raw_users;"))
-    print("raw_plans:", scalar_int(engine, "SELECT COUNT(*) FROM raw.raw_plans;"))
-    print("raw_subscriptions:", scalar_int(engine, "SELECT COUNT(*) FROM raw.raw_subscriptions;"))
-    print("raw_nps:", scalar_int(engine, "SELECT COUNT(*) FROM raw.raw_nps;"))
+    n_users, n_plans, n_subs, n_nps = scalar_ints(engine, [
+        "SELECT COUNT(*) FROM raw.raw_users;",
+        "SELECT COUNT(*) FROM raw.raw_plans;",
+        "SELECT COUNT(*) FROM raw.raw_subscriptions;",
+        "SELECT COUNT(*) FROM raw.raw_nps;",
+    ])
+    print("raw_users:", n_users)
+    print("raw_plans:", n_plans)
+    print("raw_subscriptions:", n_subs)
+    print("raw_nps:", n_nps)
 
     print("[bold green]✅ Step 1 complete[/bold green]")
 
@@ -62,7 +68,7 @@ def main() -> None:
         raise
 
     print("Step 3) Build analytical schema")
-    result = create_schema(engine, rebuild=True)
+    result = create_schema(engine, rebuild=False)  # incremental since last watermark; set True to rebuild from scratch
     print("STEP 3 done ✅", result)
     print("Inserted:", inserted)
 
@@ -70,8 +76,8 @@ def main() -> None:
     mart_counts = fetch_bi_report(engine, rebuild=True, days_back=90)
     print("[green]Mart row counts:[/green]", mart_counts)
 
-    print("[bold magenta]Step 4) Export MART tables to CSV for Power BI[/bold magenta]")
-    paths = export_bireport_to_csv(engine, out_dir="outputs/powerbi")
+    print("[bold magenta]Step 4) Export MART tables to Parquet for Power BI[/bold magenta]")
+    paths = export_bireport(engine, out_dir="outputs/powerbi")
     print("[green]Exported files:[/green]", paths)
 
     print("[bold green]✅ Step 4 done[/bold green]")
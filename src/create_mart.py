@@ -3,51 +3,90 @@ from sqlalchemy import text
 from src.config import Settings
 from src.db import get_engine
 
+# Shared projection: Users -> Subscriptions -> Plans -> NPS
+SUMMARY_SELECT = """
+    SELECT
+        u.user_id,
+        u.industry,
+        u.region,
+        u.created_at AS signup_date,
+        u.sales_rep,
+        p.plan_name,
+        p.price_usd AS monthly_revenue,
+        s.status,
+        CASE WHEN s.status = 'canceled' THEN 1 ELSE 0 END AS is_churned,
+        s.start_at AS subscription_start,
+        s.end_at AS subscription_end,
+        n.nps_score
+    FROM raw.raw_users u
+    JOIN raw.raw_subscriptions s ON u.user_id = s.user_id
+    JOIN raw.raw_plans p ON s.plan_id = p.plan_id
+    LEFT JOIN raw.raw_nps n ON u.user_id = n.user_id
+"""
+
+# All statements are static, so construct them once at import instead of
+# rebuilding text() objects on every run
+_CREATE_SCHEMA = text("CREATE SCHEMA IF NOT EXISTS analytics;")
+_JOIN_KEY_INDEXES = [
+    text("CREATE INDEX IF NOT EXISTS idx_subs_user_id ON raw.raw_subscriptions(user_id);"),
+    text("CREATE INDEX IF NOT EXISTS idx_subs_plan_id ON raw.raw_subscriptions(plan_id);"),
+    text("CREATE INDEX IF NOT EXISTS idx_nps_user_id ON raw.raw_nps(user_id);"),
+]
+_IS_MATVIEW = text("""
+    SELECT EXISTS (
+        SELECT 1 FROM pg_matviews
+        WHERE schemaname = 'analytics' AND matviewname = 'customer_churn_summary'
+    )
+""")
+_DROP_LEGACY_TABLE = text("DROP TABLE IF EXISTS analytics.customer_churn_summary;")
+_CREATE_MATVIEW = text(
+    f"CREATE MATERIALIZED VIEW analytics.customer_churn_summary AS {SUMMARY_SELECT};"
+)
+_CREATE_UNIQUE_INDEX = text(
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_ccs_user_id "
+    "ON analytics.customer_churn_summary(user_id);"
+)
+_REFRESH_MATVIEW = text(
+    "REFRESH MATERIALIZED VIEW CONCURRENTLY analytics.customer_churn_summary;"
+)
+_COUNT_ROWS = text("SELECT COUNT(*) FROM analytics.customer_churn_summary")
+
 def create_analytics_layer():
     s = Settings()
     engine = get_engine(s.sqlalchemy_url)
 
     print("[bold cyan]Creating 'analytics' schema and tables...[/bold cyan]")
-    
+
     with engine.begin() as conn:
         # 1. Create Schema
-        conn.execute(text("CREATE SCHEMA IF NOT EXISTS analytics;"))
-        
-        # 2. Drop table if exists to allow re-runs
-        conn.execute(text("DROP TABLE IF EXISTS analytics.customer_churn_summary;"))
-        
-        # 3. Create the Summary Table
-        # We join Users -> Subscriptions -> Plans -> NPS
-        query = text("""
-            CREATE TABLE analytics.customer_churn_summary AS
-            SELECT
-                u.user_id,
-                u.industry,
-                u.region,
-                u.created_at AS signup_date,
-                u.sales_rep,
-                p.plan_name,
-                p.price_usd AS monthly_revenue,
-                s.status,
-                CASE WHEN s.status = 'canceled' THEN 1 ELSE 0 END AS is_churned,
-                s.start_at AS subscription_start,
-                s.end_at AS subscription_end,
-                n.nps_score
-            FROM raw.raw_users u
-            JOIN raw.raw_subscriptions s ON u.user_id = s.user_id
-            JOIN raw.raw_plans p ON s.plan_id = p.plan_id
-            LEFT JOIN raw.raw_nps n ON u.user_id = n.user_id;
-        """)
-        conn.execute(query)
-        
-        # 4. Add a primary key/index for good measure (optional but recommended)
-        conn.execute(text("ALTER TABLE analytics.customer_churn_summary ADD PRIMARY KEY (user_id);"))
-    
-    print("[bold green]✅ Table 'analytics.customer_churn_summary' created successfully![/bold green]")
+        conn.execute(_CREATE_SCHEMA)
+
+        # Indexes on the join keys of the summary SELECT, so the planner can
+        # use index/merge joins instead of building big hash tables
+        for stmt in _JOIN_KEY_INDEXES:
+            conn.execute(stmt)
+
+        is_matview = conn.execute(_IS_MATVIEW).scalar()
+
+        if not is_matview:
+            # 2. First run (or migration from the old plain table): build the
+            # summary as a materialized view with a unique index, so later
+            # runs can refresh it concurrently while dashboards keep reading
+            conn.execute(_DROP_LEGACY_TABLE)
+            conn.execute(_CREATE_MATVIEW)
+            conn.execute(_CREATE_UNIQUE_INDEX)
+
+    if is_matview:
+        # 3. Later runs: diff-and-merge refresh without locking readers.
+        # CONCURRENTLY cannot run inside a transaction block.
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(_REFRESH_MATVIEW)
+
+    print("[bold green]✅ View 'analytics.customer_churn_summary' is up to date![/bold green]")
 
     # Verify by counting
     with engine.connect() as conn:
-        count = conn.execute(text("SELECT COUNT(*) FROM analytics.customer_churn_summary")).scalar()
+        count = conn.execute(_COUNT_ROWS).scalar()
         print(f"Total rows in summary table: [bold]{count}[/bold]")
 
 if __name__ == "__main__":
@@ -1,4 +1,9 @@
+import io
 import time
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 
@@ -20,3 +25,29 @@ def wait_for_db(engine: Engine, timeout_s: int = 60) -> None:
 def scalar_int(engine: Engine, sql: str) -> int:
     with engine.connect() as conn:
         return int(conn.execute(text(sql)).scalar() or 0)
+
+def copy_dataframe(cursor, schema: str, table: str, df: pd.DataFrame) -> None:
+    # COPY streams the rows straight into the heap with no per-row
+    # parse/plan, unlike the multi-row INSERTs to_sql(method="multi") emits.
+    # Serializing through Arrow's C++ CSV writer skips pandas' per-cell
+    # Python formatting; nulls come out as empty CSV fields, which COPY's
+    # CSV format already reads as NULL.
+    buf = io.BytesIO()
+    pa_csv.write_csv(
+        pa.Table.from_pandas(df, preserve_index=False),
+        buf,
+        pa_csv.WriteOptions(include_header=False),
+    )
+    buf.seek(0)
+    cols = ", ".join(df.columns)
+    cursor.copy_expert(
+        f"COPY {schema}.{table} ({cols}) FROM STDIN WITH (FORMAT CSV)", buf
+    )
+
+def scalar_ints(engine: Engine, sqls: list[str]) -> list[int]:
+    # Combine N scalar queries into one statement (scalar subselects) so they
+    # cost a single round trip instead of N connections/transactions
+    combined = "SELECT " + ", ".join(f"({sql.rstrip().rstrip(';')})" for sql in sqls)
+    with engine.connect() as conn:
+        row = conn.execute(text(combined)).one()
+    return [int(v or 0) for v in row]
@@ -1,91 +1,135 @@
 from __future__ import annotations
-import random
+import io
 from typing import Optional
 from datetime import datetime, timedelta, time, date
 import json
+import numpy as np
 import pandas as pd
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy import MetaData, Table
+from sqlalchemy.engine import Connection, Engine
 
 PIPELINE_NAME = "generate"
 
-def get_last_run(engine: Engine) -> Optional[datetime]:
-    with engine.connect() as conn:
-        result = conn.execute(
-            text(" SELECT last_run_at FROM raw.raw_etl_run_log WHERE pipeline = :p "),
-            {"p": PIPELINE_NAME},
-        )
-        row = result.fetchone()
+def get_last_run(conn: Connection) -> Optional[datetime]:
+    result = conn.execute(
+        text(" SELECT last_run_at FROM raw.raw_etl_run_log WHERE pipeline = :p "),
+        {"p": PIPELINE_NAME},
+    )
+    row = result.fetchone()
     return row[0] if row and row[0] else None
 
-def set_last_run(engine: Engine, ts: datetime) -> None:
-    with engine.begin() as conn:
-        conn.execute(
-            text(
-                """
-                INSERT INTO raw.raw_etl_run_log (pipeline, last_run_at)
-                VALUES (:p, :t)
-                ON CONFLICT (pipeline) DO UPDATE SET last_run_at = EXCLUDED.last_run_at;
-                """
-            ),
-            {"p": PIPELINE_NAME, "t": ts},
-        )
-
-def date_range(start_date: date, end_date:date):
-    d = start_date
-    while d <= end_date:
-        yield d
-        d += timedelta(days=1)
-
-def month_starts_between(start_date: date, end_date: date):
-    current = start_date.replace(day=1)
-    last = end_date.replace(day=1)
-    while current <= last:
-        yield current
-        current = (current.replace(day = 28) + timedelta(days=4)).replace(day=1)
+def set_last_run(conn: Connection, ts: datetime) -> None:
+    conn.execute(
+        text(
+            """
+            INSERT INTO raw.raw_etl_run_log (pipeline, last_run_at)
+            VALUES (:p, :t)
+            ON CONFLICT (pipeline) DO UPDATE SET last_run_at = EXCLUDED.last_run_at;
+            """
+        ),
+        {"p": PIPELINE_NAME, "t": ts},
+    )
 
 def next_month_start(d: date) -> date:
     # First day of next month, used to avoid re-emitting current month invoices
     return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
 
-def chunked_rows(rows: list[dict], size: int):
-    for i in range(0, len(rows), size):
-        yield rows[i : i + size]
+def read_sql_copy(engine: Engine, sql: str) -> pd.DataFrame:
+    """
+    Fetch a query as CSV via COPY TO STDOUT. The server formats the rows in
+    one stream instead of the row-by-row extended-query protocol pd.read_sql
+    uses, and read_csv parses the buffer with the C tokenizer.
+    """
+    buf = io.StringIO()
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            cur.copy_expert(
+                f"COPY ({sql.rstrip().rstrip(';')}) TO STDOUT WITH (FORMAT CSV, HEADER true)",
+                buf,
+            )
+    finally:
+        raw.close()
+    buf.seek(0)
+    return pd.read_csv(buf)
 
-def insert_ignore_conflicts(
+
+def bulk_load_via_copy(
     engine: Engine,
     *,
     schema: str,
     table_name: str,
-    rows: list[dict],
+    df: pd.DataFrame,
     pk_columns: list[str],
-    chunk_size: int = 5000,
+    jsonb_columns: tuple[str, ...] = (),
+    stage_ddl: Optional[str] = None,
+    insert_sql: Optional[str] = None,
+    raw_conn=None,
+    copy_chunk_rows: int = 200_000,
 ) -> int:
-    if not rows:
+    """
+    Bulk-load a DataFrame with COPY FROM STDIN (much faster than multi-row
+    INSERTs: no per-statement parse/plan). COPY goes into a temp table first,
+    then a single INSERT ... ON CONFLICT DO NOTHING keeps the dedup semantics.
+
+    stage_ddl/insert_sql let callers stage a narrower column set and derive
+    the remaining columns (e.g. string primary keys) in SQL on the way into
+    the target table. Pass raw_conn to run several loads on one DBAPI
+    connection/transaction; the caller then owns commit/close.
+
+    CSV serialization happens in copy_chunk_rows slices so peak memory is
+    one slice's text, not a second full copy of the frame.
+    """
+    if df.empty:
         return 0
 
-    def normalize_row(row: dict) -> dict:
-        # Convert pandas NaT/NaN to None so Postgres accepts NULLs
-        return {k: (None if pd.isna(v) else v) for k, v in row.items()}
+    if jsonb_columns:
+        df = df.copy()
+        for col in jsonb_columns:
+            df[col] = [None if v is None else json.dumps(v) for v in df[col]]
 
-    metadata = MetaData()
-    table = Table(table_name, metadata, schema=schema, autoload_with=engine)
-    inserted = 0
+    cols = ", ".join(df.columns)
+    pks = ", ".join(pk_columns)
 
-    with engine.begin() as conn:
-        for chunk in chunked_rows(rows, chunk_size):
-            chunk = [normalize_row(r) for r in chunk]
-            stmt = pg_insert(table).values(chunk).on_conflict_do_nothing(
-                index_elements=pk_columns
-            )
-            result = conn.execute(stmt)
-            inserted += result.rowcount or 0
+    if stage_ddl is None:
+        stage_ddl = (
+            f"CREATE TEMP TABLE _stage (LIKE {schema}.{table_name} INCLUDING DEFAULTS) ON COMMIT DROP;"
+        )
+    if insert_sql is None:
+        insert_sql = (
+            f"INSERT INTO {schema}.{table_name} ({cols}) "
+            f"SELECT {cols} FROM _stage ON CONFLICT ({pks}) DO NOTHING;"
+        )
+
+    owns_conn = raw_conn is None
+    raw = engine.raw_connection() if owns_conn else raw_conn
+    try:
+        with raw.cursor() as cur:
+            cur.execute(stage_ddl)
+            for start in range(0, len(df), copy_chunk_rows):
+                buf = io.StringIO()
+                # Generated timestamps are whole minutes/hours, so a fixed
+                # seconds-precision format beats the default ns-precision
+                # isoformat on both CPU and bytes
+                df.iloc[start : start + copy_chunk_rows].to_csv(
+                    buf, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S"
+                )
+                buf.seek(0)
+                cur.copy_expert(
+                    f"COPY _stage ({cols}) FROM STDIN WITH (FORMAT CSV)", buf
+                )
+            cur.execute(insert_sql)
+            inserted = cur.rowcount or 0
+            cur.execute("DROP TABLE _stage;")
+        if owns_conn:
+            raw.commit()
+    finally:
+        if owns_conn:
+            raw.close()
 
     return inserted
 
+
 def generate(
     engine: Engine,
     *,
@@ -101,16 +145,22 @@ def generate(
       - raw_tickets (support)
     Uses a watermark (raw_etl_run_log) so future runs add only new days.
     """
-    rng = random.Random(seed)
     now = datetime.now()
 
-    if force_rebuild:
-        with engine.begin() as conn:
+    # One connection/transaction for the control queries instead of one each
+    with engine.begin() as conn:
+        if force_rebuild:
             conn.exec_driver_sql("TRUNCATE raw.raw_events, raw.raw_invoices, raw.raw_tickets;")
-            conn.execute(text("DELETE FROM raw.raw_etl_run_log WHERE pipeline=:p"), {"p": PIPELINE_NAME})
-        last_run = None
-    else:
-        last_run = get_last_run(engine)
+            # Also drop the analytics watermark: facts derived from the
+            # wiped raw tables must not survive into an incremental
+            # create_schema run as ghost history
+            conn.execute(
+                text("DELETE FROM raw.raw_etl_run_log WHERE pipeline IN (:p, 'analytics')"),
+                {"p": PIPELINE_NAME},
+            )
+            last_run = None
+        else:
+            last_run = get_last_run(conn)
 
     if last_run is None:
         start_dt = now - timedelta(days=lookback_days)
@@ -120,24 +170,24 @@ def generate(
 
     end_dt = now
 
-    # --- Load base data
-    users = pd.read_sql("SELECT user_id, created_at FROM raw.raw_users", engine)
-    attrs = pd.read_sql(
-        "SELECT user_id, usage_score, base_mrr, nps_score FROM raw.raw_user_attributes",
+    # --- Load base data (users + attributes joined server-side: one round
+    # trip and no client-side merge)
+    u = read_sql_copy(
+        engine,
+        """
+        SELECT u.user_id, u.created_at, a.usage_score, a.base_mrr, a.nps_score
+        FROM raw.raw_users u
+        LEFT JOIN raw.raw_user_attributes a USING (user_id)
+        """,
+    ).fillna({"usage_score": 50, "nps_score": 7, "base_mrr": 0})
+    subs = read_sql_copy(
         engine,
-    )
-    subs = pd.read_sql(
         """
         SELECT s.subscription_id, s.user_id, s.plan_id, s.start_at, s.end_at, s.status,
                p.price_usd
         FROM raw.raw_subscriptions s
         JOIN raw.raw_plans p ON p.plan_id = s.plan_id
         """,
-        engine,
-    )
-
-    u = users.merge(attrs, on="user_id", how="left").fillna(
-        {"usage_score": 50, "nps_score": 7, "base_mrr": 0}
     )
 
     # Optional sampling (for speed on laptops)
@@ -151,43 +201,71 @@ def generate(
     start_d = start_dt.date()
     end_d = end_dt.date()
 
+    np_rng = np.random.default_rng(seed)
+    days = pd.date_range(start_d, end_d, freq="D")
+    n_days = len(days)
+    n_users = len(u)
+
+    user_ids = u["user_id"].to_numpy()
+    usage_arr = u["usage_score"].to_numpy(dtype=np.float64)
+    nps_arr = u["nps_score"].to_numpy(dtype=np.float64)
+
     # EVENTS
     event_names = ["login", "feature_used", "dashboard_view", "export_report", "settings_update"]
     features = ["automation", "crm_sync", "analytics", "billing", "alerts"]
 
-    event_rows: list[dict] = []
-    for d in date_range(start_d, end_d):
-        base_day = datetime.combine(d, time(0, 0, 0))
-        for _, r in u.iterrows():
-            usage = float(r["usage_score"])
-            # usage 0..100 => approx 0..4 events/day (capped)
-            expected = 0.2 + (usage / 100.0) * 3.8
-            n_events = min(6, int(rng.random() * expected * 2.0))
-
-            for i in range(n_events):
-                ev_time = base_day + timedelta(minutes=rng.randint(0, 1439))
-                ev_name = rng.choice(event_names)
-                ev_id = f"evt_{r['user_id']}_{ev_time.strftime('%Y%m%d%H%M')}_{ev_name}_{i}"
-                props = {"source": "sim", "usage_score": int(usage)}
-                if ev_name == "feature_used":
-                    props["feature"] = rng.choice(features)
-
-                event_rows.append(
-                    {
-                        "event_id": ev_id,
-                        "user_id": r["user_id"],
-                        "event_time": ev_time,
-                        "event_name": ev_name,
-                        "properties_json": props,
-                    }
-                )
+    # usage 0..100 => approx 0..4 events/day (capped); one batched draw for the
+    # whole (days x users) grid instead of a Python loop with scalar RNG calls
+    expected = 0.2 + (usage_arr / 100.0) * 3.8
+    n_events = (np_rng.random((n_days, n_users)) * (expected * 2.0)).astype(np.int32)
+    np.minimum(n_events, 6, out=n_events)
+
+    counts = n_events.ravel()  # day-major
+    total = int(counts.sum())
+    day_idx = np.repeat(np.repeat(np.arange(n_days), n_users), counts)
+    user_idx = np.repeat(np.tile(np.arange(n_users), n_days), counts)
+    # per-(day, user) sequence number, mirroring the old inner `for i` counter
+    seq = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    minute_offsets = np_rng.integers(0, 1440, size=total)
+    name_idx = np_rng.integers(0, len(event_names), size=total)
+    feature_idx = np_rng.integers(0, len(features), size=total)
+
+    # event_id is derived server-side from (user_id, event_time, event_name,
+    # seq) during the stage -> raw insert, so no per-row strftime/f-string here
+    events_df = pd.DataFrame(
+        {
+            "user_id": user_ids[user_idx],
+            "event_time": days.to_numpy()[day_idx]
+            + minute_offsets * np.timedelta64(60, "s"),
+            "event_name": np.array(event_names)[name_idx],
+            "seq": seq.astype(np.int64),
+        }
+    )
 
-    events_df = pd.DataFrame(event_rows)
+    # The payload schema is fixed and the values need no escaping, so build
+    # the JSON text directly instead of dumping a dict per row
+    ev_usage = usage_arr.astype(np.int64)[user_idx]
+    is_feature = events_df["event_name"].to_numpy() == "feature_used"
+    feat_suffix = (
+        ', "feature": "' + pd.Series(np.array(features)[feature_idx]) + '"}'
+    ).to_numpy()
+    events_df["properties_json"] = (
+        '{"source": "sim", "usage_score": '
+        + pd.Series(ev_usage).astype(str)
+        + np.where(is_feature, feat_suffix, "}")
+    )
+
+    events_df = events_df[
+        ["user_id", "event_time", "event_name", "seq", "properties_json"]
+    ]
 
     # INVOICES (monthly)
-    invoice_rows: list[dict] = []
-    # Build quick lookup for usage + nps
-    u_lookup = u.set_index("user_id")[["usage_score", "nps_score"]].to_dict("index")
+    # Merge usage + nps onto subs once so the loop reads contiguous columns
+    # instead of chasing a dict-of-dicts per invoice
+    subs = subs.merge(
+        u[["user_id", "usage_score", "nps_score"]], on="user_id", how="left"
+    ).fillna({"usage_score": 50, "nps_score": 7})
 
     # If this is an incremental run and we are mid-month, skip the current month's
     # invoice to avoid duplicate invoice_id inserts.
@@ -195,116 +273,213 @@ def generate(
     if last_run is not None and start_d.day != 1:
         invoice_start_d = next_month_start(start_d)
 
-    for _, s in subs.iterrows():
-        sub_start = pd.to_datetime(s["start_at"]).date()
-        sub_end = (
-            pd.to_datetime(s["end_at"]).date()
-            if pd.notna(s["end_at"])
-            else end_d
-        )
+    # Columnar extraction once (no per-row Series boxing)
+    sub_ids = subs["subscription_id"].to_numpy()
+    sub_price = subs["price_usd"].to_numpy(dtype=np.float64)
+    sub_usage = subs["usage_score"].to_numpy(dtype=np.float64)
+    sub_nps = subs["nps_score"].to_numpy(dtype=np.float64)
+    # fail probability rises when usage or nps is low
+    sub_fail_prob = (
+        0.05
+        + (np.maximum(0, 50 - sub_usage) / 200.0)
+        + (np.maximum(0, 7 - sub_nps) / 20.0)
+    )
 
-        window_start = max(sub_start, invoice_start_d)  
-        window_end = min(sub_end, end_d)
-
-        for month_start in month_starts_between(window_start, window_end):
-            issued_at = datetime.combine(month_start, time(9, 0, 0))
-            inv_id = f"inv_{s['subscription_id']}_{month_start.strftime('%Y%m')}"
-            amount = float(s["price_usd"])
-
-            info = u_lookup.get(s["user_id"], {"usage_score": 50, "nps_score": 7})
-            usage = float(info["usage_score"])
-            nps = float(info["nps_score"])
-
-            # fail probability rises when usage or nps is low
-            fail_prob = 0.05 + (max(0, 50 - usage) / 200.0) + (max(0, 7 - nps) / 20.0)
-            failed = rng.random() < min(0.35, fail_prob)
-
-            if failed:
-                paid_at = None
-                failed_at = issued_at + timedelta(hours=rng.randint(2, 48))
-                reason = rng.choice(["expired_card", "insufficient_funds", "bank_declined"])
-            else:
-                paid_at = issued_at + timedelta(hours=rng.randint(1, 24))
-                failed_at = None
-                reason = None
-
-            invoice_rows.append(
-                {
-                    "invoice_id": inv_id,
-                    "subscription_id": s["subscription_id"],
-                    "amount_usd": amount,
-                    "issued_at": issued_at,
-                    "paid_at": paid_at,
-                    "failed_at": failed_at,
-                    "failure_reason": reason,
-                }
-            )
+    # Expand (subscription, month) pairs with one broadcast window comparison
+    # instead of looping month_starts_between per subscription. Truncating to
+    # month starts commutes with max/min, so clamping the month columns gives
+    # the same months the old generator produced.
+    start_month = (
+        pd.to_datetime(subs["start_at"]).dt.to_period("M").dt.to_timestamp().to_numpy()
+    )
+    end_month = (
+        pd.to_datetime(subs["end_at"])
+        .fillna(pd.Timestamp(end_d))
+        .dt.to_period("M")
+        .dt.to_timestamp()
+        .to_numpy()
+    )
+    ws_month = np.maximum(
+        start_month, pd.Timestamp(invoice_start_d.replace(day=1)).to_datetime64()
+    )
+    we_month = np.minimum(
+        end_month, pd.Timestamp(end_d.replace(day=1)).to_datetime64()
+    )
 
-    invoices_df = pd.DataFrame(invoice_rows)
+    if len(sub_ids) > 0 and ws_month.min() <= we_month.max():
+        months = pd.date_range(ws_month.min(), we_month.max(), freq="MS").to_numpy()
+    else:
+        months = np.array([], dtype="datetime64[ns]")
+
+    in_window = (months[None, :] >= ws_month[:, None]) & (
+        months[None, :] <= we_month[:, None]
+    )
+    sub_i, month_i = np.nonzero(in_window)
+
+    # One batched draw per random quantity instead of per-invoice RNG calls
+    n_invoices = len(sub_i)
+    failed_mask = np_rng.random(n_invoices) < np.minimum(0.35, sub_fail_prob[sub_i])
+    paid_delay = np_rng.integers(1, 25, size=n_invoices) * np.timedelta64(3600, "s")
+    failed_delay = np_rng.integers(2, 49, size=n_invoices) * np.timedelta64(3600, "s")
+    reasons = np.array(["expired_card", "insufficient_funds", "bank_declined"])[
+        np_rng.integers(0, 3, size=n_invoices)
+    ]
+
+    issued_arr = months[month_i] + np.timedelta64(9, "h")
+    invoices_df = pd.DataFrame(
+        {
+            "subscription_id": sub_ids[sub_i],
+            "amount_usd": sub_price[sub_i],
+            "issued_at": issued_arr,
+            "paid_at": np.where(
+                failed_mask, np.datetime64("NaT"), issued_arr + paid_delay
+            ),
+            "failed_at": np.where(
+                failed_mask, issued_arr + failed_delay, np.datetime64("NaT")
+            ),
+            "failure_reason": np.where(failed_mask, reasons, None),
+        }
+    )
 
     # TICKETS (daily)
-    ticket_rows: list[dict] = []
     categories = ["billing", "bug", "how_to", "performance"]
 
-    for d in date_range(start_d, end_d):
-        base_day = datetime.combine(d, time(0, 0, 0))
-        for _, r in u.iterrows():
-            usage = float(r["usage_score"])
-            nps = float(r["nps_score"])
-
-            # baseline tiny chance + bumps for low usage/nps
-            p = 0.002 + (max(0, 40 - usage) / 20000.0) + (max(0, 6 - nps) / 5000.0)
-            if rng.random() < min(0.02, p):
-                created_at = base_day + timedelta(minutes=rng.randint(0, 1439))
-                resolved_at = created_at + timedelta(hours=rng.randint(2, 72))
-                csat = max(1, min(5, int(round((nps / 2) + rng.choice([-1, 0, 0, 1])))))
-                tkt_id = f"tkt_{r['user_id']}_{created_at.strftime('%Y%m%d%H%M')}"
-
-                ticket_rows.append(
-                    {
-                        "ticket_id": tkt_id,
-                        "user_id": r["user_id"],
-                        "created_at": created_at,
-                        "category": rng.choice(categories),
-                        "resolved_at": resolved_at,
-                        "csat": csat,
-                    }
-                )
-
-    tickets_df = pd.DataFrame(ticket_rows)
+    # baseline tiny chance + bumps for low usage/nps, as a Bernoulli mask over
+    # the same (days x users) grid
+    p = (
+        0.002
+        + (np.maximum(0, 40 - usage_arr) / 20000.0)
+        + (np.maximum(0, 6 - nps_arr) / 5000.0)
+    )
+    ticket_mask = np_rng.random((n_days, n_users)) < np.minimum(0.02, p)
+    t_day_idx, t_user_idx = np.nonzero(ticket_mask)
+    n_tickets = len(t_day_idx)
+
+    created_at = days.to_numpy()[t_day_idx] + np_rng.integers(
+        0, 1440, size=n_tickets
+    ) * np.timedelta64(60, "s")
+    resolved_at = created_at + np_rng.integers(2, 73, size=n_tickets) * np.timedelta64(
+        3600, "s"
+    )
+    csat = np.clip(
+        np.round(nps_arr[t_user_idx] / 2.0)
+        + np_rng.choice([-1, 0, 0, 1], size=n_tickets),
+        1,
+        5,
+    ).astype(np.int64)
+
+    tickets_df = pd.DataFrame(
+        {
+            "user_id": user_ids[t_user_idx],
+            "created_at": created_at,
+            "category": np.array(categories)[
+                np_rng.integers(0, len(categories), size=n_tickets)
+            ],
+            "resolved_at": resolved_at,
+            "csat": csat,
+        }
+    )
+    tickets_df = tickets_df[
+        ["user_id", "created_at", "category", "resolved_at", "csat"]
+    ]
 
-    # --- Load to Postgres (append)
+    # --- Load to Postgres (append); one connection + one transaction for all
+    # three COPY loads
     inserted = {"raw_events": 0, "raw_invoices": 0, "raw_tickets": 0}
 
-    if len(events_df) > 0:
-        inserted["raw_events"] = insert_ignore_conflicts(
-            engine,
-            schema="raw",
-            table_name="raw_events",
-            rows=events_df.to_dict(orient="records"),
-            pk_columns=["event_id"],
-            chunk_size=1000,
-        )
+    raw_conn = engine.raw_connection()
+    try:
+        if len(events_df) > 0:
+            inserted["raw_events"] = bulk_load_via_copy(
+                engine,
+                schema="raw",
+                table_name="raw_events",
+                df=events_df,
+                pk_columns=["event_id"],
+                raw_conn=raw_conn,
+                stage_ddl="""
+                    CREATE TEMP TABLE _stage (
+                      user_id         TEXT,
+                      event_time      TIMESTAMP,
+                      event_name      TEXT,
+                      seq             INT,
+                      properties_json JSONB
+                    ) ON COMMIT DROP;
+                """,
+                insert_sql="""
+                    INSERT INTO raw.raw_events (event_id, user_id, event_time, event_name, properties_json)
+                    SELECT 'evt_' || user_id || '_' || to_char(event_time, 'YYYYMMDDHH24MI')
+                             || '_' || event_name || '_' || seq,
+                           user_id, event_time, event_name, properties_json
+                    FROM _stage
+                    ON CONFLICT (event_id) DO NOTHING;
+                """,
+            )
 
-    if len(invoices_df) > 0:
-        inserted["raw_invoices"] = insert_ignore_conflicts(
-            engine,
-            schema="raw",
-            table_name="raw_invoices",
-            rows=invoices_df.to_dict(orient="records"),
-            pk_columns=["invoice_id"],
-            chunk_size=1000,
-        )
+        if len(invoices_df) > 0:
+            inserted["raw_invoices"] = bulk_load_via_copy(
+                engine,
+                schema="raw",
+                table_name="raw_invoices",
+                df=invoices_df,
+                pk_columns=["invoice_id"],
+                raw_conn=raw_conn,
+                stage_ddl="""
+                    CREATE TEMP TABLE _stage (
+                      subscription_id TEXT,
+                      amount_usd      NUMERIC(10,2),
+                      issued_at       TIMESTAMP,
+                      paid_at         TIMESTAMP,
+                      failed_at       TIMESTAMP,
+                      failure_reason  TEXT
+                    ) ON COMMIT DROP;
+                """,
+                insert_sql="""
+                    INSERT INTO raw.raw_invoices (invoice_id, subscription_id, amount_usd,
+                                                  issued_at, paid_at, failed_at, failure_reason)
+                    SELECT 'inv_' || subscription_id || '_' || to_char(issued_at, 'YYYYMM'),
+                           subscription_id, amount_usd, issued_at, paid_at, failed_at, failure_reason
+                    FROM _stage
+                    ON CONFLICT (invoice_id) DO NOTHING;
+                """,
+            )
 
-    if len(tickets_df) > 0:
-        inserted["raw_tickets"] = insert_ignore_conflicts(
-            engine,
-            schema="raw",
-            table_name="raw_tickets",
-            rows=tickets_df.to_dict(orient="records"),
-            pk_columns=["ticket_id"],
-            chunk_size=1000,
-        )
+        if len(tickets_df) > 0:
+            inserted["raw_tickets"] = bulk_load_via_copy(
+                engine,
+                schema="raw",
+                table_name="raw_tickets",
+                df=tickets_df,
+                pk_columns=["ticket_id"],
+                raw_conn=raw_conn,
+                stage_ddl="""
+                    CREATE TEMP TABLE _stage (
+                      user_id     TEXT,
+                      created_at  TIMESTAMP,
+                      category    TEXT,
+                      resolved_at TIMESTAMP,
+                      csat        INTEGER
+                    ) ON COMMIT DROP;
+                """,
+                insert_sql="""
+                    INSERT INTO raw.raw_tickets (ticket_id, user_id, created_at, category, resolved_at, csat)
+                    SELECT 'tkt_' || user_id || '_' || to_char(created_at, 'YYYYMMDDHH24MI'),
+                           user_id, created_at, category, resolved_at, csat
+                    FROM _stage
+                    ON CONFLICT (ticket_id) DO NOTHING;
+                """,
+            )
+
+        # Fresh planner stats right after the bulk load, before downstream
+        # steps query these tables
+        with raw_conn.cursor() as cur:
+            cur.execute(
+                "ANALYZE raw.raw_events; ANALYZE raw.raw_invoices; ANALYZE raw.raw_tickets;"
+            )
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
 
-    set_last_run(engine, now)
+    with engine.begin() as conn:
+        set_last_run(conn, now)
     return inserted
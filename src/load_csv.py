@@ -1,72 +1,128 @@
+import numpy as np
 import pandas as pd
 from sqlalchemy.engine import Engine
 
-def _plan_id(plan_type: str) -> str:
-    return f"{str(plan_type).strip().lower()}_m"
+from src.db import copy_dataframe
+
+# Copy-on-write makes the df[[...]] slices below share backing arrays until
+# written to, so the per-table frames no longer clone the whole CSV
+pd.set_option("mode.copy_on_write", True)
 
 def load_csv_to_raw(engine: Engine, csv_path: str, force_reload: bool) -> dict[str, int]:
-    df = pd.read_csv(csv_path)
+    # One connection and one transaction for the whole load: the
+    # already-loaded check, the optional TRUNCATE and the four COPYs below
+    # share it, so there is a single round of connection checkout and the
+    # early return happens before the CSV is even parsed
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM raw.raw_users;")
+            existing = cur.fetchone()[0] or 0
+            if existing > 0 and not force_reload:
+                return {"raw_users": 0, "raw_plans": 0, "raw_subscriptions": 0, "raw_nps": 0}
+            if force_reload:
+                cur.execute(
+                    "TRUNCATE raw.raw_subscriptions, raw.raw_nps, raw.raw_users, raw.raw_plans "
+                    "RESTART IDENTITY CASCADE;"
+                )
+                # The cascade also wipes the generated events/invoices/
+                # tickets, so the generator and analytics watermarks must go
+                # with it — otherwise the next incremental run would treat
+                # the wiped history as already processed. Guarded because
+                # the run log is created in a later pipeline step.
+                cur.execute(
+                    """
+                    DO $$ BEGIN
+                      IF to_regclass('raw.raw_etl_run_log') IS NOT NULL THEN
+                        DELETE FROM raw.raw_etl_run_log
+                        WHERE pipeline IN ('generate', 'analytics');
+                      END IF;
+                    END $$;
+                    """
+                )
+            counts = _parse_and_copy(cur, csv_path)
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+    return counts
+
 
-    expected = {
+def _parse_and_copy(cur, csv_path: str) -> dict[str, int]:
+    expected = [
         "customer_id","industry","region","signup_date","plan_type","monthly_revenue",
         "churned","renewal_date","sales_rep","usage_score","nps_score"
-    }
-    missing = expected - set(df.columns)
-    if missing:
-        raise ValueError(f"CSV missing columns: {sorted(missing)}")
+    ]
+    try:
+        # pyarrow parses the CSV multi-threaded and usecols projects away any
+        # extra columns before they are ever materialized as pandas blocks
+        df = pd.read_csv(
+            csv_path,
+            engine="pyarrow",
+            usecols=expected,
+            dtype={
+                "plan_type": "category",
+                "industry": "category",
+                "region": "category",
+                "sales_rep": "category",
+                "churned": "int8",
+            },
+        )
+    except KeyError as e:
+        # pyarrow raises ArrowKeyError when a usecols entry is absent
+        raise ValueError(f"CSV missing columns ({csv_path}): {e}") from e
 
-    df["signup_date"] = pd.to_datetime(df["signup_date"]).dt.date
+    # Parse dates after the read: parse_dates under the pyarrow engine hands
+    # back raw strings when a value is missing or unparseable, whereas
+    # errors="coerce" keeps those as NaT (null renewal dates are expected —
+    # the survey_at fillna and end_at branches below handle them)
+    df["signup_date"] = pd.to_datetime(df["signup_date"], errors="coerce").dt.date
     df["renewal_date"] = pd.to_datetime(df["renewal_date"], errors="coerce").dt.date
 
-    if force_reload:
-        with engine.begin() as conn:
-            conn.exec_driver_sql(
-                "TRUNCATE raw.raw_subscriptions, raw.raw_nps, raw.raw_users, raw.raw_plans "
-                "RESTART IDENTITY CASCADE;"
-            )
-
-    with engine.connect() as conn:
-        existing = conn.exec_driver_sql("SELECT COUNT(*) FROM raw.raw_users;").scalar() or 0
-    if existing > 0 and not force_reload:
-        return {"raw_users": 0, "raw_plans": 0, "raw_subscriptions": 0, "raw_nps": 0}
+    users = df[["customer_id","signup_date","industry","region","sales_rep"]]
+    users = users.rename(columns={"customer_id":"user_id", "signup_date":"created_at"})
 
-    users = df[["customer_id","signup_date","industry","region","sales_rep"]].copy()
-    users.rename(columns={"customer_id":"user_id", "signup_date":"created_at"}, inplace=True)
-
-    plans = (
-        df.groupby("plan_type", as_index=False)["monthly_revenue"]
-          .median()
-          .rename(columns={"monthly_revenue":"price_usd"})
-    )
-    plans["plan_id"] = plans["plan_type"].apply(_plan_id)
-    plans.rename(columns={"plan_type":"plan_name"}, inplace=True)
-    plans["billing_period"] = "monthly"
-    plans = plans[["plan_id","plan_name","price_usd","billing_period"]]
-
-    subs = df[["customer_id","plan_type","signup_date","renewal_date","churned"]].copy()
-    subs["subscription_id"] = subs["customer_id"].apply(lambda x: f"sub_{x}")
+    subs = df[["customer_id","plan_type","signup_date","renewal_date","churned"]]
+    subs["subscription_id"] = "sub_" + subs["customer_id"].astype(str)
     subs["user_id"] = subs["customer_id"]
-    subs["plan_id"] = subs["plan_type"].apply(_plan_id)
+    subs["plan_id"] = subs["plan_type"].astype(str).str.strip().str.lower() + "_m"
     subs["start_at"] = subs["signup_date"]
-    subs["status"] = subs["churned"].apply(lambda x: "canceled" if int(x) == 1 else "active")
-    subs["end_at"] = subs.apply(lambda r: r["renewal_date"] if r["status"] == "canceled" else None, axis=1)
+    churned = subs["churned"].to_numpy()
+    subs["status"] = np.where(churned == 1, "canceled", "active")
+    subs["end_at"] = np.where(churned == 1, subs["renewal_date"], None)
     subs["cancel_reason"] = None
     subs = subs[["subscription_id","user_id","plan_id","start_at","end_at","status","cancel_reason"]]
 
-    nps = df[["customer_id","renewal_date","signup_date","nps_score"]].copy()
-    nps["nps_id"] = nps["customer_id"].apply(lambda x: f"nps_{x}")
+    nps = df[["customer_id","renewal_date","signup_date","nps_score"]]
+    nps["nps_id"] = "nps_" + nps["customer_id"].astype(str)
     nps["user_id"] = nps["customer_id"]
     nps["survey_at"] = nps["renewal_date"].fillna(nps["signup_date"])
     nps = nps[["nps_id","user_id","survey_at","nps_score"]]
 
-    plans.to_sql("raw_plans", engine, schema="raw", if_exists="append", index=False, method="multi", chunksize=5000)
-    users.to_sql("raw_users", engine, schema="raw", if_exists="append", index=False, method="multi", chunksize=5000)
-    subs.to_sql("raw_subscriptions", engine, schema="raw", if_exists="append", index=False, method="multi", chunksize=5000)
-    nps.to_sql("raw_nps", engine, schema="raw", if_exists="append", index=False, method="multi", chunksize=5000)
+    # Plans are derived server-side: stage the two columns the median needs
+    # and let Postgres aggregate, instead of a client groupby + upload.
+    # Plans and users load first so the subscription FKs resolve.
+    cur.execute(
+        "CREATE TEMP TABLE _plans_stage "
+        "(plan_type TEXT, monthly_revenue DOUBLE PRECISION) ON COMMIT DROP;"
+    )
+    copy_dataframe(cur, "pg_temp", "_plans_stage", df[["plan_type", "monthly_revenue"]])
+    cur.execute("""
+        INSERT INTO raw.raw_plans (plan_id, plan_name, price_usd, billing_period)
+        SELECT lower(trim(plan_type)) || '_m',
+               plan_type,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY monthly_revenue),
+               'monthly'
+        FROM _plans_stage
+        GROUP BY plan_type;
+    """)
+    n_plans = cur.rowcount
+    copy_dataframe(cur, "raw", "raw_users", users)
+    copy_dataframe(cur, "raw", "raw_subscriptions", subs)
+    copy_dataframe(cur, "raw", "raw_nps", nps)
 
     return {
         "raw_users": len(users),
-        "raw_plans": len(plans),
+        "raw_plans": n_plans,
         "raw_subscriptions": len(subs),
         "raw_nps": len(nps),
     }
@@ -1,9 +1,39 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
+from src.db import scalar_ints
+
+
+def _is_batchable(stmt: str) -> bool:
+    # Plain DDL/maintenance statements can ship to the server as one
+    # semicolon-separated script; the big INSERT ... SELECTs, the staging
+    # CTAS statements and the DO blocks stay separate so an error points
+    # at the statement that raised it
+    s = stmt.strip()
+    return not (
+        s.startswith("INSERT")
+        or s.startswith("DO")
+        or "CREATE UNLOGGED TABLE" in s
+    )
+
+
+def _exec_script(conn, batch: list[str]) -> None:
+    conn.exec_driver_sql(";\n".join(s.strip().rstrip(";") for s in batch) + ";")
+
+
+def _exec_bulk(engine: Engine, stmt: str, params: dict | None = None) -> None:
+    # Own connection per statement so independent inserts run concurrently;
+    # synchronous_commit=off skips the WAL fsync wait for these rebuildable
+    # tables (the data is still crash-safe once the pipeline finishes)
+    with engine.begin() as conn:
+        conn.execute(text("SET LOCAL synchronous_commit = off;"))
+        conn.execute(text(stmt), params or {})
+
 
 @dataclass(frozen=True)
 class schema:
@@ -19,6 +49,17 @@ class schema:
 
 
 def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
+    # High-watermark for incremental runs: with rebuild=False and a previous
+    # successful run on record, the fact inserts only recompute the days /
+    # months that raw rows newer than the watermark touch, upserting into
+    # place instead of truncating everything
+    with engine.connect() as conn:
+        last_run = conn.execute(text(
+            "SELECT last_run_at FROM raw.raw_etl_run_log WHERE pipeline = 'analytics'"
+        )).scalar()
+    incremental = (not rebuild) and last_run is not None
+    params = {"wm": last_run} if incremental else None
+
     statements: list[str] = []
 
     # Schemas
@@ -28,7 +69,11 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
     ]
 
     # -------------------------
-    # Staging views
+    # Staging layer: users/plans stay views (cheap, tiny); the hot relations
+    # (subscriptions, events, invoices, tickets) are materialized as UNLOGGED
+    # tables so every downstream insert scans a pre-computed, ANALYZEd heap
+    # instead of re-running the view subquery. The DROP VIEW lines migrate
+    # databases built before these were tables.
     # -------------------------
     statements += [
         """
@@ -55,8 +100,10 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           billing_period
         FROM raw.raw_plans;
         """,
+        "DROP VIEW IF EXISTS stg.subscriptions;",
+        "DROP TABLE IF EXISTS stg.subscriptions;",
         """
-        CREATE OR REPLACE VIEW stg.subscriptions AS
+        CREATE UNLOGGED TABLE stg.subscriptions AS
         SELECT
           s.subscription_id,
           s.user_id,
@@ -69,8 +116,12 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
         JOIN stg.plans p
           ON p.plan_id = s.plan_id;
         """,
+        "CREATE INDEX idx_stg_subs_sub_user ON stg.subscriptions(subscription_id, user_id);",
+        "ANALYZE stg.subscriptions;",
+        "DROP VIEW IF EXISTS stg.events;",
+        "DROP TABLE IF EXISTS stg.events;",
         """
-        CREATE OR REPLACE VIEW stg.events AS
+        CREATE UNLOGGED TABLE stg.events AS
         SELECT
           e.event_id,
           e.user_id,
@@ -80,8 +131,12 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           (e.properties_json->>'feature') AS feature
         FROM raw.raw_events e;
         """,
+        "CREATE INDEX idx_stg_events_user_date ON stg.events(user_id, event_date);",
+        "ANALYZE stg.events;",
+        "DROP VIEW IF EXISTS stg.invoices;",
+        "DROP TABLE IF EXISTS stg.invoices;",
         """
-        CREATE OR REPLACE VIEW stg.invoices AS
+        CREATE UNLOGGED TABLE stg.invoices AS
         SELECT
           i.invoice_id,
           i.subscription_id,
@@ -99,8 +154,12 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           i.failure_reason
         FROM raw.raw_invoices i;
         """,
+        "CREATE INDEX idx_stg_inv_sub_month ON stg.invoices(subscription_id, month_start);",
+        "ANALYZE stg.invoices;",
+        "DROP VIEW IF EXISTS stg.tickets;",
+        "DROP TABLE IF EXISTS stg.tickets;",
         """
-        CREATE OR REPLACE VIEW stg.tickets AS
+        CREATE UNLOGGED TABLE stg.tickets AS
         SELECT
           t.ticket_id,
           t.user_id,
@@ -116,11 +175,41 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           t.csat
         FROM raw.raw_tickets t;
         """,
+        "ANALYZE stg.tickets;",
     ]
 
     # -------------------------
     # Analytics tables
     # -------------------------
+    # A full rebuild migrates any pre-partitioning plain fact table by
+    # dropping it (relkind 'r' = ordinary table); the data is reinserted
+    # from staging anyway
+    if not incremental:
+        statements += [
+            """
+            DO $$ BEGIN
+              IF EXISTS (SELECT 1 FROM pg_class c
+                         JOIN pg_namespace n ON n.oid = c.relnamespace
+                         WHERE n.nspname = 'analytics'
+                           AND c.relname = 'fact_daily_activity'
+                           AND c.relkind = 'r') THEN
+                DROP TABLE analytics.fact_daily_activity;
+              END IF;
+            END $$;
+            """,
+            """
+            DO $$ BEGIN
+              IF EXISTS (SELECT 1 FROM pg_class c
+                         JOIN pg_namespace n ON n.oid = c.relnamespace
+                         WHERE n.nspname = 'analytics'
+                           AND c.relname = 'fact_monthly_billing'
+                           AND c.relkind = 'r') THEN
+                DROP TABLE analytics.fact_monthly_billing;
+              END IF;
+            END $$;
+            """,
+        ]
+
     statements += [
         # Dimensions
         """
@@ -153,7 +242,10 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           day_of_week INT NOT NULL
         );
         """,
-        # Facts
+        # Facts — the two date-keyed ones are range-partitioned by month so
+        # recent-window queries (kpi_daily, bi_report.user_daily) prune to a
+        # few partitions instead of scanning all history. Their primary
+        # keys already contain the partition key.
         """
         CREATE TABLE IF NOT EXISTS analytics.fact_daily_activity (
           activity_date DATE NOT NULL,
@@ -162,7 +254,11 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           active_flag INT NOT NULL,
           feature_used_count INT NOT NULL,
           PRIMARY KEY (activity_date, user_id)
-        );
+        ) PARTITION BY RANGE (activity_date);
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS analytics.fact_daily_activity_default
+          PARTITION OF analytics.fact_daily_activity DEFAULT;
         """,
         """
         CREATE TABLE IF NOT EXISTS analytics.fact_daily_support(
@@ -187,7 +283,11 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           amount_paid_usd NUMERIC(10,2) NOT NULL,
           amount_failed_usd NUMERIC(10,2) NOT NULL,
           PRIMARY KEY (month_start, subscription_id)
-        );
+        ) PARTITION BY RANGE (month_start);
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS analytics.fact_monthly_billing_default
+          PARTITION OF analytics.fact_monthly_billing DEFAULT;
         """,
         """
         CREATE TABLE IF NOT EXISTS analytics.fact_churn(
@@ -231,8 +331,9 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
         "CREATE INDEX IF NOT EXISTS idx_kpi_day ON analytics.kpi_daily(date_day);",
     ]
 
-    # Rebuild data
-    if rebuild:
+    # Rebuild data; on incremental runs the dims and facts upsert in place
+    # and only the whole-history KPI/cohort aggregates start from scratch
+    if not incremental:
         statements += [
             "TRUNCATE TABLE analytics.dim_user;",
             "TRUNCATE TABLE analytics.dim_plan;",
@@ -241,16 +342,26 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
             "TRUNCATE TABLE analytics.fact_daily_support;",
             "TRUNCATE TABLE analytics.fact_monthly_billing;",
             "TRUNCATE TABLE analytics.fact_churn;",
-            "TRUNCATE TABLE analytics.kpi_daily;",
-            "TRUNCATE TABLE analytics.retention_cohort_monthly;",
         ]
+    statements += [
+        "TRUNCATE TABLE analytics.kpi_daily;",
+        "TRUNCATE TABLE analytics.retention_cohort_monthly;",
+    ]
 
     # dim_user
     statements += [
         """
         INSERT INTO analytics.dim_user(user_id, signup_date, industry, region, sales_rep, usage_score, nps_score, base_mrr)
         SELECT user_id, signup_date, industry, region, sales_rep, usage_score, nps_score, base_mrr
-        FROM stg.users;
+        FROM stg.users
+        ON CONFLICT (user_id) DO UPDATE SET
+          signup_date = EXCLUDED.signup_date,
+          industry = EXCLUDED.industry,
+          region = EXCLUDED.region,
+          sales_rep = EXCLUDED.sales_rep,
+          usage_score = EXCLUDED.usage_score,
+          nps_score = EXCLUDED.nps_score,
+          base_mrr = EXCLUDED.base_mrr;
         """
     ]
 
@@ -259,7 +370,11 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
         """
         INSERT INTO analytics.dim_plan(plan_id, plan_name, price_usd, billing_period)
         SELECT plan_id, plan_name, price_usd, billing_period
-        FROM stg.plans;
+        FROM stg.plans
+        ON CONFLICT (plan_id) DO UPDATE SET
+          plan_name = EXCLUDED.plan_name,
+          price_usd = EXCLUDED.price_usd,
+          billing_period = EXCLUDED.billing_period;
         """
     ]
 
@@ -289,28 +404,72 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           date_trunc('month', date_day)::date AS month_start,
           EXTRACT(WEEK FROM date_day)::int AS week,
           EXTRACT(ISODOW FROM date_day)::int AS day_of_week
-        FROM spine;
+        FROM spine
+        ON CONFLICT (date_day) DO NOTHING;
         """
     ]
 
-    # fact_daily_activity
+    # Monthly child partitions covering the date spine (dim_date is filled
+    # just above, in the same transaction). IF NOT EXISTS makes reruns and
+    # incremental extensions no-ops for months already covered; anything
+    # outside the spine falls into the DEFAULT partitions.
     statements += [
         """
+        DO $$
+        DECLARE m DATE;
+        BEGIN
+          FOR m IN SELECT DISTINCT month_start FROM analytics.dim_date ORDER BY 1 LOOP
+            EXECUTE format(
+              'CREATE TABLE IF NOT EXISTS analytics.%I PARTITION OF analytics.fact_daily_activity FOR VALUES FROM (%L) TO (%L)',
+              'fact_daily_activity_' || to_char(m, 'YYYYMM'), m, (m + interval '1 month')::date);
+            EXECUTE format(
+              'CREATE TABLE IF NOT EXISTS analytics.%I PARTITION OF analytics.fact_monthly_billing FOR VALUES FROM (%L) TO (%L)',
+              'fact_monthly_billing_' || to_char(m, 'YYYYMM'), m, (m + interval '1 month')::date);
+          END LOOP;
+        END $$;
+        """
+    ]
+
+    # The four fact inserts are independent of each other once staging and
+    # dims exist, so they run concurrently on separate connections
+    fact_statements: list[str] = []
+    kpi_statements: list[str] = []
+
+    # fact_daily_activity — incremental runs recompute only the days that
+    # raw events newer than the watermark touch; recomputing the whole day
+    # keeps the aggregates exact while the upsert slots them into place
+    activity_scope = (
+        "WHERE e.event_date IN (SELECT DISTINCT event_time::date "
+        "FROM raw.raw_events WHERE event_time > :wm)"
+        if incremental else ""
+    )
+    fact_statements += [
+        f"""
         INSERT INTO analytics.fact_daily_activity(activity_date, user_id, event_count, active_flag, feature_used_count)
         SELECT
           e.event_date AS activity_date,
           e.user_id,
           COUNT(*)::int AS event_count,
           CASE WHEN COUNT(*) > 0 THEN 1 ELSE 0 END AS active_flag,
-          SUM(CASE WHEN e.event_name = 'feature_used' THEN 1 ELSE 0 END)::int AS feature_used_count
+          COUNT(*) FILTER (WHERE e.event_name = 'feature_used')::int AS feature_used_count
         FROM stg.events e
-        GROUP BY 1,2;
+        {activity_scope}
+        GROUP BY 1,2
+        ON CONFLICT (activity_date, user_id) DO UPDATE SET
+          event_count = EXCLUDED.event_count,
+          active_flag = EXCLUDED.active_flag,
+          feature_used_count = EXCLUDED.feature_used_count;
         """
     ]
 
     # fact_daily_support
-    statements += [
-        """
+    support_scope = (
+        "WHERE t.created_date IN (SELECT DISTINCT created_at::date "
+        "FROM raw.raw_tickets WHERE created_at > :wm)"
+        if incremental else ""
+    )
+    fact_statements += [
+        f"""
         INSERT INTO analytics.fact_daily_support(support_date, user_id, tickets_created, avg_resolution_hours, avg_csat)
         SELECT
           t.created_date AS support_date,
@@ -319,13 +478,23 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           AVG(t.resolution_hours) AS avg_resolution_hours,
           AVG(t.csat) AS avg_csat
         FROM stg.tickets t
-        GROUP BY 1,2;
+        {support_scope}
+        GROUP BY 1,2
+        ON CONFLICT (support_date, user_id) DO UPDATE SET
+          tickets_created = EXCLUDED.tickets_created,
+          avg_resolution_hours = EXCLUDED.avg_resolution_hours,
+          avg_csat = EXCLUDED.avg_csat;
         """
     ]
 
-    # fact_monthly_billing
-    statements += [
-        """
+    # fact_monthly_billing — scoped by the months new invoices land in
+    billing_scope = (
+        "WHERE i.month_start IN (SELECT DISTINCT date_trunc('month', issued_at)::date "
+        "FROM raw.raw_invoices WHERE issued_at > :wm)"
+        if incremental else ""
+    )
+    fact_statements += [
+        f"""
         INSERT INTO analytics.fact_monthly_billing(
           month_start, subscription_id, user_id, plan_id, mrr_usd,
           invoices_issued, invoices_paid, invoices_failed,
@@ -338,19 +507,29 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           s.plan_id,
           p.price_usd AS mrr_usd,
           COUNT(*)::int AS invoices_issued,
-          SUM(CASE WHEN i.invoice_status = 'paid' THEN 1 ELSE 0 END)::int AS invoices_paid,
-          SUM(CASE WHEN i.invoice_status = 'failed' THEN 1 ELSE 0 END)::int AS invoices_failed,
-          SUM(CASE WHEN i.invoice_status = 'paid' THEN i.amount_usd ELSE 0 END)::numeric(12,2) AS amount_paid_usd,
-          SUM(CASE WHEN i.invoice_status = 'failed' THEN i.amount_usd ELSE 0 END)::numeric(12,2) AS amount_failed_usd
+          COUNT(*) FILTER (WHERE i.invoice_status = 'paid')::int AS invoices_paid,
+          COUNT(*) FILTER (WHERE i.invoice_status = 'failed')::int AS invoices_failed,
+          COALESCE(SUM(i.amount_usd) FILTER (WHERE i.invoice_status = 'paid'), 0)::numeric(12,2) AS amount_paid_usd,
+          COALESCE(SUM(i.amount_usd) FILTER (WHERE i.invoice_status = 'failed'), 0)::numeric(12,2) AS amount_failed_usd
         FROM stg.invoices i
         JOIN stg.subscriptions s ON s.subscription_id = i.subscription_id
         JOIN stg.plans p ON p.plan_id = s.plan_id
-        GROUP BY 1,2,3,4,5;
+        {billing_scope}
+        GROUP BY 1,2,3,4,5
+        ON CONFLICT (month_start, subscription_id) DO UPDATE SET
+          user_id = EXCLUDED.user_id,
+          plan_id = EXCLUDED.plan_id,
+          mrr_usd = EXCLUDED.mrr_usd,
+          invoices_issued = EXCLUDED.invoices_issued,
+          invoices_paid = EXCLUDED.invoices_paid,
+          invoices_failed = EXCLUDED.invoices_failed,
+          amount_paid_usd = EXCLUDED.amount_paid_usd,
+          amount_failed_usd = EXCLUDED.amount_failed_usd;
         """
     ]
 
     # fact_churn
-    statements += [
+    fact_statements += [
         """
         INSERT INTO analytics.fact_churn(churn_date, subscription_id, user_id, plan_id)
         SELECT
@@ -360,12 +539,13 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           s.plan_id
         FROM stg.subscriptions s
         WHERE s.status = 'canceled'
-          AND s.end_date IS NOT NULL;
+          AND s.end_date IS NOT NULL
+        ON CONFLICT (churn_date, subscription_id) DO NOTHING;
         """
     ]
 
     # kpi_daily
-    statements += [
+    kpi_statements += [
         """
         INSERT INTO analytics.kpi_daily(
           date_day, dau, active_customers, new_signups, churned_users, churn_rate,
@@ -373,18 +553,58 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
         )
         WITH
         dau AS (
-          SELECT activity_date AS d, COUNT(DISTINCT user_id)::int AS dau
+          -- (activity_date, user_id) is the PK, so user_id is already
+          -- distinct per day and the per-group hash-set build of
+          -- COUNT(DISTINCT ...) is unnecessary
+          SELECT activity_date AS d, COUNT(*)::int AS dau
           FROM analytics.fact_daily_activity
           WHERE active_flag = 1
           GROUP BY 1
         ),
+        -- Active customers per day as an event sweep: each merged per-user
+        -- span emits +1 at its start and -1 at its end, and a running sum
+        -- over the date spine replaces the O(days x subscriptions) range
+        -- join. Overlapping or touching spans of the same user are merged
+        -- first so nobody is counted twice on a day.
+        sub_spans AS (
+          SELECT DISTINCT user_id, start_date, end_date
+          FROM stg.subscriptions
+        ),
+        span_islands AS (
+          SELECT user_id, start_date, end_date,
+                 SUM(new_island) OVER (
+                   PARTITION BY user_id
+                   ORDER BY start_date, COALESCE(end_date, 'infinity'::date)
+                 ) AS island_id
+          FROM (
+            SELECT user_id, start_date, end_date,
+                   CASE WHEN start_date <= MAX(COALESCE(end_date, 'infinity'::date)) OVER (
+                          PARTITION BY user_id
+                          ORDER BY start_date, COALESCE(end_date, 'infinity'::date)
+                          ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)
+                        THEN 0 ELSE 1 END AS new_island
+            FROM sub_spans
+          ) marked
+        ),
+        islands AS (
+          SELECT user_id,
+                 MIN(start_date) AS start_date,
+                 CASE WHEN BOOL_OR(end_date IS NULL) THEN NULL ELSE MAX(end_date) END AS end_date
+          FROM span_islands
+          GROUP BY user_id, island_id
+        ),
+        active_deltas AS (
+          SELECT start_date AS d, 1 AS delta FROM islands
+          UNION ALL
+          SELECT end_date, -1 FROM islands WHERE end_date IS NOT NULL
+        ),
         active_customers AS (
-          SELECT dd.date_day AS d, COUNT(DISTINCT s.user_id)::int AS active_customers
+          SELECT dd.date_day AS d,
+                 SUM(COALESCE(nd.net, 0)) OVER (ORDER BY dd.date_day)::int AS active_customers
           FROM analytics.dim_date dd
-          JOIN stg.subscriptions s
-            ON s.start_date <= dd.date_day
-           AND (s.end_date IS NULL OR s.end_date > dd.date_day)
-          GROUP BY 1
+          LEFT JOIN (
+            SELECT d, SUM(delta)::int AS net FROM active_deltas GROUP BY d
+          ) nd ON nd.d = dd.date_day
         ),
         signups AS (
           SELECT signup_date AS d, COUNT(*)::int AS new_signups
@@ -403,8 +623,8 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
         ),
         inv AS (
           SELECT issued_date AS d,
-                 SUM(CASE WHEN invoice_status='failed' THEN 1 ELSE 0 END)::int AS invoices_failed,
-                 SUM(CASE WHEN invoice_status='paid' THEN amount_usd ELSE 0 END)::numeric(12,2) AS paid_revenue_usd
+                 COUNT(*) FILTER (WHERE invoice_status = 'failed')::int AS invoices_failed,
+                 COALESCE(SUM(amount_usd) FILTER (WHERE invoice_status = 'paid'), 0)::numeric(12,2) AS paid_revenue_usd
           FROM stg.invoices
           GROUP BY 1
         )
@@ -432,7 +652,7 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
     ]
 
     # retention_cohort_monthly
-    statements += [
+    kpi_statements += [
         """
         INSERT INTO analytics.retention_cohort_monthly(
           cohort_month, active_month, months_since_signup, cohort_size, active_users, retention_rate
@@ -466,7 +686,11 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
           GROUP BY 1
         ),
         active_counts AS (
-          SELECT cohort_month, active_month, months_since_signup, COUNT(DISTINCT user_id)::int AS active_users
+          -- cohorts has one row per user and active_months is already
+          -- deduped to (user_id, active_month), so the join emits each
+          -- user at most once per month and COUNT(DISTINCT) would only
+          -- re-verify that with a per-group hash set
+          SELECT cohort_month, active_month, months_since_signup, COUNT(*)::int AS active_users
           FROM joined
           GROUP BY 1,2,3
         )
@@ -482,22 +706,53 @@ def create_schema(engine: Engine, *, rebuild: bool = True) -> schema:
         """
     ]
 
-    # Execute everything
+    # Phase 1: schemas, staging, DDL, truncates and dim inserts, in order on
+    # one connection — everything the fact inserts depend on
     with engine.begin() as conn:
+        conn.execute(text("SET LOCAL synchronous_commit = off;"))
+        # Ship runs of consecutive batchable DDL as one script to cut the
+        # per-statement execute round trips
+        batch: list[str] = []
         for stmt in statements:
+            if _is_batchable(stmt):
+                batch.append(stmt)
+                continue
+            if batch:
+                _exec_script(conn, batch)
+                batch = []
             conn.execute(text(stmt))
+        if batch:
+            _exec_script(conn, batch)
 
-        dim_user = conn.execute(text("SELECT COUNT(*) FROM analytics.dim_user")).scalar_one()
-        dim_plan = conn.execute(text("SELECT COUNT(*) FROM analytics.dim_plan")).scalar_one()
-        dim_date = conn.execute(text("SELECT COUNT(*) FROM analytics.dim_date")).scalar_one()
+    # Phase 2: the four independent fact inserts in parallel
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda s: _exec_bulk(engine, s, params), fact_statements))
 
-        fda = conn.execute(text("SELECT COUNT(*) FROM analytics.fact_daily_activity")).scalar_one()
-        fds = conn.execute(text("SELECT COUNT(*) FROM analytics.fact_daily_support")).scalar_one()
-        fmr = conn.execute(text("SELECT COUNT(*) FROM analytics.fact_monthly_billing")).scalar_one()
-        fch = conn.execute(text("SELECT COUNT(*) FROM analytics.fact_churn")).scalar_one()
+    # Phase 3: kpi_daily and the retention cohort only read the facts, so
+    # they can also run side by side
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda s: _exec_bulk(engine, s), kpi_statements))
+
+    # Only advance the watermark once every phase has committed
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO raw.raw_etl_run_log(pipeline, last_run_at) "
+            "VALUES ('analytics', now()) "
+            "ON CONFLICT (pipeline) DO UPDATE SET last_run_at = EXCLUDED.last_run_at;"
+        ))
 
-        kpi = conn.execute(text("SELECT COUNT(*) FROM analytics.kpi_daily")).scalar_one()
-        coh = conn.execute(text("SELECT COUNT(*) FROM analytics.retention_cohort_monthly")).scalar_one()
+    # All nine verification counts in a single round trip
+    dim_user, dim_plan, dim_date, fda, fds, fmr, fch, kpi, coh = scalar_ints(engine, [
+        "SELECT COUNT(*) FROM analytics.dim_user",
+        "SELECT COUNT(*) FROM analytics.dim_plan",
+        "SELECT COUNT(*) FROM analytics.dim_date",
+        "SELECT COUNT(*) FROM analytics.fact_daily_activity",
+        "SELECT COUNT(*) FROM analytics.fact_daily_support",
+        "SELECT COUNT(*) FROM analytics.fact_monthly_billing",
+        "SELECT COUNT(*) FROM analytics.fact_churn",
+        "SELECT COUNT(*) FROM analytics.kpi_daily",
+        "SELECT COUNT(*) FROM analytics.retention_cohort_monthly",
+    ])
 
     return schema(
         dim_user=dim_user,
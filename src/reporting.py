@@ -5,9 +5,13 @@ from pathlib import Path
 from typing import Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
+from src.db import scalar_ints
+
 
 @dataclass(frozen=True)
 class BIReport:
@@ -22,10 +26,16 @@ def fetch_bi_report(engine: Engine, *, rebuild: bool = True, days_back: int = 90
     Step 4: Build BI-friendly tables (bi_report schema)
 
     Tables:
-    - bi_report.user_daily                  (last N days only; can be big)
+    - bi_report.user_daily                  (matview, last N days only; only
+                                             (day, user) pairs with activity
+                                             or support data)
     - bi_report.subscription_monthly
     - bi_report.kpi_daily
     - bi_report.cohort_retention
+
+    NOTE: days_back is baked into the user_daily view definition; a
+    non-rebuild run refreshes the stored window (relative to CURRENT_DATE),
+    so pass rebuild=True to change the window size.
     """
 
     statements: list[str] = []
@@ -33,25 +43,32 @@ def fetch_bi_report(engine: Engine, *, rebuild: bool = True, days_back: int = 90
     # Create Schema
     statements.append("CREATE SCHEMA IF NOT EXISTS bi_report;")
 
-    if rebuild:
-        statements += [
-            "DROP TABLE IF EXISTS bi_report.user_daily;",
-            "DROP TABLE IF EXISTS bi_report.subscription_monthly;",
-            "DROP TABLE IF EXISTS bi_report.kpi_daily;",
-            "DROP TABLE IF EXISTS bi_report.cohort_retention;",
-        ]
+    # The three CTAS tables are cheap and always rebuilt, so drop them
+    # unconditionally — otherwise a rebuild=False rerun would die on the
+    # CREATE TABLE below before ever reaching the user_daily refresh.
+    # user_daily manages its own lifecycle further down.
+    statements += [
+        "DROP TABLE IF EXISTS bi_report.subscription_monthly;",
+        "DROP TABLE IF EXISTS bi_report.kpi_daily;",
+        "DROP TABLE IF EXISTS bi_report.cohort_retention;",
+    ]
 
-    # 1) bi_report.user_daily (FILTER dates first, then cross join)
-    statements.append(
-        """
-        CREATE TABLE bi_report.user_daily AS
-        WITH dd AS (
-          SELECT date_day
-          FROM analytics.dim_date
-          WHERE date_day >= (CURRENT_DATE - make_interval(days => :days_back))
+    # 1) bi_report.user_daily — a materialized view keyed on the (day, user)
+    # pairs that actually have activity or support rows, instead of the old
+    # dim_date x dim_user cross join that materialized mostly-NULL rows for
+    # every user on every day. The unique index lets reruns refresh it
+    # CONCURRENTLY without locking dashboard readers.
+    user_daily_sql = f"""
+        CREATE MATERIALIZED VIEW bi_report.user_daily AS
+        WITH active AS (
+          SELECT activity_date AS date_day, user_id
+          FROM analytics.fact_daily_activity
+          UNION
+          SELECT support_date, user_id
+          FROM analytics.fact_daily_support
         )
         SELECT
-          dd.date_day,
+          a.date_day,
           u.user_id,
           u.industry,
           u.region,
@@ -61,29 +78,24 @@ def fetch_bi_report(engine: Engine, *, rebuild: bool = True, days_back: int = 90
           u.nps_score,
           u.base_mrr,
 
-          COALESCE(a.event_count, 0) AS event_count,
-          COALESCE(a.active_flag, 0) AS active_flag,
-          COALESCE(a.feature_used_count, 0) AS feature_used_count,
-
-          COALESCE(s.tickets_created, 0) AS tickets_created,
-          s.avg_resolution_hours,
-          s.avg_csat
-        FROM dd
-        CROSS JOIN analytics.dim_user u
-        LEFT JOIN analytics.fact_daily_activity a
-          ON a.activity_date = dd.date_day
-         AND a.user_id = u.user_id
-        LEFT JOIN analytics.fact_daily_support s
-          ON s.support_date = dd.date_day
-         AND s.user_id = u.user_id
-        ;
-        """
-    )
+          COALESCE(fda.event_count, 0) AS event_count,
+          COALESCE(fda.active_flag, 0) AS active_flag,
+          COALESCE(fda.feature_used_count, 0) AS feature_used_count,
 
-    statements += [
-        "CREATE INDEX IF NOT EXISTS idx_bi_user_daily_day ON bi_report.user_daily(date_day);",
-        "CREATE INDEX IF NOT EXISTS idx_bi_user_daily_user ON bi_report.user_daily(user_id);",
-    ]
+          COALESCE(fds.tickets_created, 0) AS tickets_created,
+          fds.avg_resolution_hours,
+          fds.avg_csat
+        FROM active a
+        JOIN analytics.dim_user u
+          ON u.user_id = a.user_id
+        LEFT JOIN analytics.fact_daily_activity fda
+          ON fda.activity_date = a.date_day
+         AND fda.user_id = a.user_id
+        LEFT JOIN analytics.fact_daily_support fds
+          ON fds.support_date = a.date_day
+         AND fds.user_id = a.user_id
+        WHERE a.date_day >= (CURRENT_DATE - make_interval(days => {int(days_back)}));
+        """
 
     # 2) bi_report.subscription_monthly
     statements.append(
@@ -144,36 +156,154 @@ def fetch_bi_report(engine: Engine, *, rebuild: bool = True, days_back: int = 90
     # Execute everything (IMPORTANT: use begin() so DDL commits)
     with engine.begin() as conn:
         for stmt in statements:
-            if ":days_back" in stmt:
-                conn.execute(text(stmt), {"days_back": int(days_back)})
-            else:
-                conn.execute(text(stmt))
+            conn.execute(text(stmt))
+
+        is_matview = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_matviews "
+            "WHERE schemaname = 'bi_report' AND matviewname = 'user_daily')"
+        )).scalar()
+        if rebuild or not is_matview:
+            # First run, window change, or migration from the old plain table
+            conn.execute(text("DROP TABLE IF EXISTS bi_report.user_daily;"))
+            conn.execute(text("DROP MATERIALIZED VIEW IF EXISTS bi_report.user_daily;"))
+            conn.execute(text(user_daily_sql))
+            conn.execute(text(
+                "CREATE UNIQUE INDEX idx_bi_user_daily_key "
+                "ON bi_report.user_daily(date_day, user_id);"
+            ))
+            conn.execute(text(
+                "CREATE INDEX idx_bi_user_daily_user ON bi_report.user_daily(user_id);"
+            ))
+            refresh_user_daily = False
+        else:
+            refresh_user_daily = True
+
+    if refresh_user_daily:
+        # CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY bi_report.user_daily;"))
 
-        c1 = conn.execute(text("SELECT COUNT(*) FROM bi_report.user_daily;")).scalar_one()
-        c2 = conn.execute(text("SELECT COUNT(*) FROM bi_report.subscription_monthly;")).scalar_one()
-        c3 = conn.execute(text("SELECT COUNT(*) FROM bi_report.kpi_daily;")).scalar_one()
-        c4 = conn.execute(text("SELECT COUNT(*) FROM bi_report.cohort_retention;")).scalar_one()
+    # All four verification counts in a single round trip
+    c1, c2, c3, c4 = scalar_ints(engine, [
+        "SELECT COUNT(*) FROM bi_report.user_daily",
+        "SELECT COUNT(*) FROM bi_report.subscription_monthly",
+        "SELECT COUNT(*) FROM bi_report.kpi_daily",
+        "SELECT COUNT(*) FROM bi_report.cohort_retention",
+    ])
 
     return BIReport(
-        user_daily=int(c1),
-        subscription_monthly=int(c2),
-        kpi_daily=int(c3),
-        cohort_retention=int(c4),
+        user_daily=c1,
+        subscription_monthly=c2,
+        kpi_daily=c3,
+        cohort_retention=c4,
     )
 
 
-def export_bireport_to_csv(
+# Postgres type OIDs -> Arrow types, for pinning export schemas up front
+_PG_OID_TO_ARROW = {
+    16: pa.bool_(),            # bool
+    20: pa.int64(),            # int8
+    21: pa.int16(),            # int2
+    23: pa.int32(),            # int4
+    25: pa.string(),           # text
+    700: pa.float32(),         # float4
+    701: pa.float64(),         # float8
+    1042: pa.string(),         # bpchar
+    1043: pa.string(),         # varchar
+    1082: pa.date32(),         # date
+    1114: pa.timestamp("us"),  # timestamp
+    1184: pa.timestamp("us", tz="UTC"),  # timestamptz
+}
+
+
+def _result_schema(engine: Engine, sql: str) -> Optional[pa.Schema]:
+    # Pin the Parquet schema from the result's catalog types so it cannot
+    # drift with whatever the first chunk happens to contain — an all-NULL
+    # avg_csat in chunk one must not force the whole column to Arrow null,
+    # nor ints flap between int64 and float64 across chunks
+    raw_conn = engine.raw_connection()
+    try:
+        cur = raw_conn.cursor()
+        try:
+            cur.execute(f"SELECT * FROM ({sql}) AS _schema_probe LIMIT 0")
+            desc = cur.description
+        finally:
+            cur.close()
+    finally:
+        raw_conn.close()
+
+    fields = []
+    for name, type_code, _, _, precision, scale, _ in desc:
+        if type_code == 1700:  # numeric(p, s)
+            if precision is None:
+                return None
+            fields.append(pa.field(name, pa.decimal128(precision, scale)))
+        elif type_code in _PG_OID_TO_ARROW:
+            fields.append(pa.field(name, _PG_OID_TO_ARROW[type_code]))
+        else:
+            # Unknown driver type: fall back to first-chunk inference
+            return None
+    return pa.schema(fields)
+
+
+def _export_parquet(engine: Engine, sql: str, path: Path, chunk_rows: int = 50_000) -> None:
+    # Stream the result set chunk by chunk into one Parquet file so even
+    # user_daily never has to fit in pandas at once
+    schema = _result_schema(engine, sql)
+    writer = None
+    try:
+        for chunk in pd.read_sql(sql, engine, chunksize=chunk_rows):
+            tbl = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, tbl.schema, compression="zstd")
+            elif schema is None:
+                # No catalog schema (unknown type): best effort against the
+                # first chunk's inference
+                tbl = tbl.cast(writer.schema)
+            writer.write_table(tbl)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        # Empty result: still emit a file with the right columns
+        if schema is not None:
+            pq.write_table(schema.empty_table(), path, compression="zstd")
+        else:
+            empty = pd.read_sql(f"{sql} LIMIT 0", engine)
+            pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), path, compression="zstd")
+
+
+def _export_csv_copy(engine: Engine, sql: str, path: Path) -> None:
+    # COPY formats the CSV on the server and streams bytes straight into
+    # the file — no pandas materialization, no Python-level row loop, so
+    # memory stays constant no matter how big the table is
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cur, open(path, "wb") as f:
+            cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT CSV, HEADER true)", f)
+    finally:
+        raw_conn.close()
+
+
+def export_bireport(
     engine: Engine,
     *,
     out_dir: str = "outputs/powerbi",
+    format: str = "parquet",
     include_user_daily: bool = False,
     user_daily_limit: Optional[int] = None,
 ) -> dict[str, str]:
     """
-    Export bi_report tables to CSV.
+    Export bi_report tables to Parquet (default) or CSV.
+
+    Parquet is a fraction of the CSV size and loads far faster in
+    Power BI/duckdb thanks to the columnar layout and dictionary encoding.
 
     NOTE: user_daily can be huge (millions). Default include_user_daily=False.
     """
+    if format not in ("parquet", "csv"):
+        raise ValueError(f"Unsupported export format: {format!r}")
+
     out = Path(out_dir)
     out.mkdir(parents=True, exist_ok=True)
 
@@ -192,9 +322,29 @@ def export_bireport_to_csv(
     paths: dict[str, str] = {}
 
     for name, sql in exports.items():
-        df = pd.read_sql(sql, engine)
-        path = out / f"{name}.csv"
-        df.to_csv(path, index=False)
+        if format == "parquet":
+            path = out / f"{name}.parquet"
+            _export_parquet(engine, sql, path)
+        else:
+            path = out / f"{name}.csv"
+            _export_csv_copy(engine, sql, path)
         paths[name] = str(path)
 
     return paths
+
+
+def export_bireport_to_csv(
+    engine: Engine,
+    *,
+    out_dir: str = "outputs/powerbi",
+    include_user_daily: bool = False,
+    user_daily_limit: Optional[int] = None,
+) -> dict[str, str]:
+    """Backwards-compatible CSV export; see export_bireport."""
+    return export_bireport(
+        engine,
+        out_dir=out_dir,
+        format="csv",
+        include_user_daily=include_user_daily,
+        user_daily_limit=user_daily_limit,
+    )
@@ -1,7 +1,11 @@
+import io
+
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pa_csv
 
 def create_table(engine: Engine) -> None:
     ddl = """
@@ -49,6 +53,8 @@ def create_table(engine: Engine) -> None:
 
     CREATE INDEX IF NOT EXISTS idx_events_user_time ON raw.raw_events(user_id, event_time);
     CREATE INDEX IF NOT EXISTS idx_invoices_issued ON raw.raw_invoices(issued_at);
+    DROP INDEX IF EXISTS raw.idx_invoices_paid;
+    DROP INDEX IF EXISTS raw.idx_invoices_failed;
     CREATE INDEX IF NOT EXISTS idx_tickets_user_time ON raw.raw_tickets(user_id, created_at);
     """
     with engine.begin() as conn:
@@ -56,24 +62,40 @@ def create_table(engine: Engine) -> None:
 
 
 def load_user_attributes(engine: Engine, csv_path: str) -> int:
-    df = pd.read_csv(csv_path)
-
-    keep = df[["customer_id", "usage_score", "monthly_revenue", "nps_score"]].copy()
-    keep.rename(columns={
-        "customer_id": "user_id",
-        "monthly_revenue": "base_mrr"
-    }, inplace=True)
+    # The whole load stays in Arrow: projected CSV read, column renames,
+    # and the C++ CSV writer feeding COPY — no pandas frame in between
+    tbl = pa_csv.read_csv(
+        csv_path,
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=["customer_id", "usage_score", "monthly_revenue", "nps_score"]
+        ),
+    )
+    tbl = tbl.rename_columns(["user_id", "usage_score", "base_mrr", "nps_score"])
+    # usage_score lands in an INTEGER column; the old INSERT path relied on
+    # Postgres's implicit float->int rounding cast, which COPY's CSV parser
+    # does not apply, so round explicitly
+    tbl = tbl.set_column(
+        tbl.schema.get_field_index("usage_score"),
+        "usage_score",
+        pc.round(tbl["usage_score"]).cast(pa.int32()),
+    )
 
-    with engine.begin() as conn:
-        conn.exec_driver_sql("TRUNCATE raw.raw_user_attributes;")
+    buf = io.BytesIO()
+    pa_csv.write_csv(tbl, buf, pa_csv.WriteOptions(include_header=False))
+    buf.seek(0)
 
-    keep.to_sql(
-        "raw_user_attributes",
-        engine,
-        schema="raw",
-        if_exists="append",
-        index=False,
-        chunksize=5000,
-        method="multi",
-    )
-    return len(keep)
\ No newline at end of file
+    # Truncate and COPY in the same transaction so a failed load rolls back
+    # to the previous attributes instead of an empty table
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cur:
+            cur.execute("TRUNCATE raw.raw_user_attributes;")
+            cur.copy_expert(
+                "COPY raw.raw_user_attributes (user_id, usage_score, base_mrr, nps_score) "
+                "FROM STDIN WITH (FORMAT CSV)",
+                buf,
+            )
+        raw_conn.commit()
+    finally:
+        raw_conn.close()
+    return tbl.num_rows
\ No newline at end of file